@@ -6,32 +6,50 @@
 import os
 import re
 import io
-import json
 import argparse
 import logging
+import threading
+import time
+import hashlib
+from collections import namedtuple
+from functools import lru_cache, partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import IO, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from diskcache import Cache
 
 # Google Sheets
 import gspread
 from google.oauth2.service_account import Credentials
 
 # Resume parsing
-from pdfminer.high_level import extract_text as extract_pdf_text
+import pypdfium2 as pdfium
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
 from docx import Document
 
 # Notifications & scheduling
 import smtplib
 from email.message import EmailMessage
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from sqlalchemy import Column, DateTime, MetaData, String, Table, create_engine, select
 
 # Optional fuzzy matching
 try:
-    from rapidfuzz import fuzz
+    from rapidfuzz import fuzz, process
+    from rapidfuzz.utils import default_process
 except Exception:
     fuzz = None
+    process = None
 
 
 # SECTION 1: Logging & config
@@ -51,6 +69,9 @@ SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
 SMTP_USER = os.getenv('SMTP_USER')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
 FROM_EMAIL = os.getenv('FROM_EMAIL', SMTP_USER)
+JOBSTORE_URL = os.getenv('JOBSTORE_URL', 'sqlite:///jobs.sqlite')
+RESUME_CACHE_DIR = os.getenv('RESUME_CACHE_DIR', '.resume_cache')
+RESUME_CACHE_TTL = 7 * 24 * 3600  # seconds
 
 # Default follow-ups (8 messages) and default schedule offsets (days after initial)
 DEFAULT_FOLLOWUPS = [
@@ -89,110 +110,284 @@ class SheetsWrapper:
         self.client = client
         self.master_ss = client.open_by_key(master_sheet_id)
         self.detail_ss = client.open_by_key(detail_sheet_id)
+        # (spreadsheet id, sheet name) -> (Drive modifiedTime, DataFrame)
+        self._cache: Dict[Tuple[str, str], Tuple[str, pd.DataFrame]] = {}
+        # (spreadsheet id, sheet name) -> (rows, columns) last known to hold values
+        self._extent: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def _read_sheet(self, ss: gspread.Spreadsheet, sheet_name: str) -> pd.DataFrame:
+        """Read a worksheet, skipping the download when the spreadsheet has not changed."""
+        key = (ss.id, sheet_name)
+        modified = ss.get_lastUpdateTime()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == modified:
+            return cached[1].copy()
+        rows = ss.worksheet(sheet_name).get_all_values()
+        # get_all_values returns strings; numericise like get_all_records so RAW writes keep numbers
+        data = [gspread.utils.numericise_all(row, empty2zero=False, default_blank='') for row in rows[1:]]
+        df = pd.DataFrame(data, columns=rows[0]) if rows else pd.DataFrame()
+        self._cache[key] = (modified, df)
+        self._extent[key] = (len(rows), len(rows[0]) if rows else 0)
+        return df.copy()
 
     def read_master(self, sheet_name: str = 'master') -> pd.DataFrame:
-        sh = self.master_ss.worksheet(sheet_name)
-        data = sh.get_all_records()
-        return pd.DataFrame(data)
+        return self._read_sheet(self.master_ss, sheet_name)
 
     def read_detail(self, sheet_name: str = 'detail') -> pd.DataFrame:
-        sh = self.detail_ss.worksheet(sheet_name)
-        data = sh.get_all_records()
-        return pd.DataFrame(data)
+        return self._read_sheet(self.detail_ss, sheet_name)
 
     def update_detail_from_df(self, df: pd.DataFrame, sheet_name: str = 'detail'):
+        key = (self.detail_ss.id, sheet_name)
+        values = [df.columns.values.tolist()] + df.values.tolist()
+        width = len(values[0])
+        extent = self._extent.get(key)
+        if extent is None:
+            # Unknown previous extent: clear first so a shrunken frame leaves no stale cells
+            self.detail_ss.values_clear(f"'{sheet_name}'")
+        else:
+            # Pad with blanks up to the last known extent so the single write also clears leftovers
+            old_rows, old_cols = extent
+            width = max(width, old_cols)
+            values = [row + [''] * (width - len(row)) for row in values]
+            values += [[''] * width for _ in range(old_rows - len(values))]
+        # Overwrite the sheet from A1 in a single values.update request
+        self.detail_ss.values_update(
+            f"'{sheet_name}'!A1",
+            params={'valueInputOption': 'RAW'},
+            body={'values': values},
+        )
+        # Our write bumps modifiedTime, and an edit landing right after it would be
+        # indistinguishable from it, so the next read downloads the sheet again
+        self._cache.pop(key, None)
+        self._extent[key] = (len(df) + 1, len(df.columns))
+
+    def append_detail_rows(self, rows: List[Dict], sheet_name: str = 'detail'):
+        """Append candidate dicts below the existing rows in one append_rows request."""
+        if not rows:
+            return
         sh = self.detail_ss.worksheet(sheet_name)
-        # Replace entire sheet values
-        sh.clear()
-        sh.update([df.columns.values.tolist()] + df.values.tolist())
-
-    def append_detail_row(self, row: Dict, sheet_name: str = 'detail'):
-        sh = self.detail_ss.worksheet(sheet_name)
-        values = [row.get(c, '') for c in sh.row_values(1)]
-        sh.append_row(values)
+        header = sh.row_values(1)
+        values = [[row.get(c, '') for c in header] for row in rows]
+        sh.append_rows(values, value_input_option='RAW')
+        # The sheet now extends past the last known extent
+        self._cache.pop((self.detail_ss.id, sheet_name), None)
+        self._extent.pop((self.detail_ss.id, sheet_name), None)
 
 
 # SECTION 3: Resume extraction utilities
 
 
+# Resumes carry their signal on the first pages; later pages (portfolios, charts) are skipped.
+# The cap applies to both the pdfium path and the pdfminer fallback.
+PDF_MAX_PAGES = 3
+
+
+def _extract_pdf_text_pdfminer(fp: IO[bytes]) -> str:
+    """pdfminer text extraction capped at PDF_MAX_PAGES."""
+    rsrcmgr = PDFResourceManager(caching=True)
+    out = io.StringIO()
+    # Layout analysis is what emits line breaks; without it adjacent lines are glued together
+    device = TextConverter(rsrcmgr, out, laparams=LAParams())
+    try:
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        for page in PDFPage.get_pages(fp, maxpages=PDF_MAX_PAGES, caching=True):
+            interpreter.process_page(page)
+    finally:
+        device.close()
+    return out.getvalue()
+
+
 def extract_text_from_pdf(path_or_bytes: bytes | str) -> str:
-    """Extract text from PDF file path or bytes. If bytes provided, use io.BytesIO."""
+    """Extract text from the first PDF_MAX_PAGES pages of a PDF file path or bytes using pdfium;
+    falls back to pdfminer on failure."""
     try:
         if isinstance(path_or_bytes, (bytes, bytearray)):
-            text = extract_pdf_text(io.BytesIO(path_or_bytes))
+            pdf = pdfium.PdfDocument(io.BytesIO(path_or_bytes))
         else:
-            text = extract_pdf_text(path_or_bytes)
-        return text
+            pdf = pdfium.PdfDocument(path_or_bytes)
+        try:
+            pages = []
+            for i in range(min(len(pdf), PDF_MAX_PAGES)):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                pages.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+            return '\n'.join(pages)
+        finally:
+            pdf.close()
+    except Exception as e:
+        logger.warning('pdfium parse failed, falling back to pdfminer: %s', e)
+    try:
+        if isinstance(path_or_bytes, (bytes, bytearray)):
+            return _extract_pdf_text_pdfminer(io.BytesIO(path_or_bytes))
+        with open(path_or_bytes, 'rb') as fp:
+            return _extract_pdf_text_pdfminer(fp)
     except Exception as e:
         logger.exception('PDF parse failed: %s', e)
         return ''
 
 
-def extract_text_from_docx(path: str) -> str:
+def extract_text_from_docx(path_or_file: str | IO[bytes]) -> str:
     try:
-        doc = Document(path)
+        doc = Document(path_or_file)
         return '\n'.join(p.text for p in doc.paragraphs)
     except Exception as e:
         logger.exception('DOCX parse failed: %s', e)
         return ''
 
 
-def fetch_resume_text_from_url(url: str) -> str:
-    """If detail_sheet stores a resume URL, fetch it and extract text. Uses requests."""
-    import requests
+# Shared session so concurrent downloads reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32))
+_SESSION.mount('http://', HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+
+def download_resume(url: str, session: Optional[requests.Session] = None) -> Tuple[bytes | str, str]:
+    """Download a resume URL without parsing it. Returns (payload, kind): kind 'pdf' or 'docx'
+    with the raw bytes, or 'text' with the decoded body. A failed download gives ('', 'text')."""
+    if session is None:
+        session = _SESSION
     try:
-        r = requests.get(url, timeout=20)
+        r = session.get(url, timeout=20)
         r.raise_for_status()
         ctype = r.headers.get('Content-Type','')
         if 'pdf' in ctype or url.lower().endswith('.pdf'):
-            return extract_text_from_pdf(r.content)
+            return r.content, 'pdf'
         elif 'word' in ctype or url.lower().endswith('.docx'):
-            # Save to temp and parse
-            with open('/tmp/temp_resume.docx','wb') as f:
-                f.write(r.content)
-            return extract_text_from_docx('/tmp/temp_resume.docx')
+            return r.content, 'docx'
         else:
-            return r.text
+            return r.text, 'text'
     except Exception as e:
         logger.exception('Failed fetching resume url: %s', e)
+        return '', 'text'
+
+
+def extract_text_from_download(payload: bytes | str, kind: str) -> str:
+    """Extract text from a download_resume result."""
+    if kind == 'pdf':
+        return extract_text_from_pdf(payload)
+    if kind == 'docx':
+        # Parse in memory; no temp file shared between workers
+        return extract_text_from_docx(io.BytesIO(payload))
+    return payload
+
+
+def fetch_resume_text_from_url(url: str, session: Optional[requests.Session] = None) -> str:
+    """If detail_sheet stores a resume URL, fetch it and extract text. Uses requests."""
+    return extract_text_from_download(*download_resume(url, session))
+
+
+@lru_cache(maxsize=None)
+def _resume_cache() -> Cache:
+    """Parsed resume text persisted across scheduler ticks, opened on first use.
+    Entries are (cached_at, text) so a newer updated_at on the sheet row can invalidate them."""
+    return Cache(RESUME_CACHE_DIR)
+
+
+def _cache_lookup(key: str, updated_at: Optional[float] = None) -> Optional[str]:
+    entry = _resume_cache().get(key)
+    if entry is not None and (updated_at is None or updated_at <= entry[0]):
+        return entry[1]
+    return None
+
+
+def _cache_store(key: str, text: str):
+    # Failed fetches return '' and are retried next run rather than cached
+    if text:
+        _resume_cache().set(key, (time.time(), text), expire=RESUME_CACHE_TTL)
+
+
+def _url_cache_key(url: str) -> str:
+    return 'url:' + hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _extract_worker(source: str | bytes, kind: Optional[str] = None, updated_at: Optional[float] = None) -> str:
+    """Process-pool entrypoint. source is either downloaded resume bytes of the given kind
+    ('pdf' or 'docx'), or a local resume path whose text is cached on (path, mtime, size)."""
+    if kind is not None:
+        return extract_text_from_download(source, kind)
+    path = source
+    if path.lower().endswith('.pdf'):
+        loader = partial(extract_text_from_pdf, path)
+    elif path.lower().endswith('.docx'):
+        loader = partial(extract_text_from_docx, path)
+    else:
         return ''
+    try:
+        st = os.stat(path)
+    except OSError:
+        return loader()
+    key = 'path:' + hashlib.sha256(f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}".encode('utf-8')).hexdigest()
+    text = _cache_lookup(key, updated_at)
+    if text is None:
+        text = loader()
+        _cache_store(key, text)
+    return text
+
+
+def _parse_updated_at(value) -> Optional[float]:
+    """Parse a sheet timestamp cell (updated_at, resume_fetched_at) into a POSIX timestamp;
+    blank or unparseable gives None."""
+    if not value:
+        return None
+    ts = pd.to_datetime(value, errors='coerce')
+    if pd.isna(ts):
+        return None
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(datetime.now().astimezone().tzinfo)
+    return ts.timestamp()
 
 
 # SECTION 4: Candidate enrichment heuristics
 
 
-EDUCATION_PATTERNS = {
+EDUCATION_PATTERNS = {k: re.compile(v, re.I) for k, v in {
     'btech': r"\bB\.?\s?Tech\b|Bachelor\s+of\s+Technology|BTech\b",
     'bsc': r"\bB\.?\s?Sc\b|Bachelor\s+of\s+Science",
     'mtech': r"\bM\.?\s?Tech\b|Master\s+of\s+Technology",
     'msc': r"\bM\.?\s?Sc\b|Master\s+of\s+Science",
     'mba': r"\bMBA\b|Master\s+of\s+Business\s+Administration",
-}
+}.items()}
 
 LOCATION_KEYWORDS = [
     'Hyderabad', 'Bengaluru', 'Bangalore', 'Pune', 'Chennai', 'Mumbai', 'Delhi'
 ]
 
+# Compiled once at import so the per-candidate helpers skip the re cache lookup
+# Earlier LOCATION_KEYWORDS entries win when a resume mentions several cities
+_LOC_RANK = {loc.lower(): rank for rank, loc in enumerate(LOCATION_KEYWORDS)}
+# Matched against lowercased text: a case-sensitive alternation scans far faster than re.I
+_LOC_RE = re.compile(r"\b(?:" + "|".join(re.escape(loc.lower()) for loc in LOCATION_KEYWORDS) + r")\b")
+_YEARS_RE = re.compile(r"(\d+)\s+years?", re.I)
+_MONTHS_RE = re.compile(r"(\d+)\s+months?", re.I)
+_WORD_RE = re.compile(r"\w+")
+# All degrees as one alternation of named groups, so detection is a single scan
+_EDU_ALTERNATION = "|".join(f"(?P<{k}>{pat.pattern})" for k, pat in EDUCATION_PATTERNS.items())
+_EDU_RE = re.compile(_EDU_ALTERNATION, re.I)
+
 
 def detect_education(text: str) -> List[str]:
-    found = []
-    for key, pat in EDUCATION_PATTERNS.items():
-        if re.search(pat, text, flags=re.I):
-            found.append(key)
-    return found
+    found = {m.lastgroup for m in _EDU_RE.finditer(text)}
+    return [key for key in EDUCATION_PATTERNS if key in found]
 
 
 def detect_location(text: str) -> Optional[str]:
-    for loc in LOCATION_KEYWORDS:
-        if re.search(r'\b' + re.escape(loc) + r'\b', text, flags=re.I):
-            return loc
-    return None
+    # One scan for all keywords; a hash lookup ranks each hit by LOCATION_KEYWORDS order
+    best = None
+    for m in _LOC_RE.finditer(text.lower()):
+        rank = _LOC_RANK[m.group()]
+        if best is None or rank < best:
+            best = rank
+            if best == 0:
+                break
+    return LOCATION_KEYWORDS[best] if best is not None else None
 
 
 def estimate_experience_months(text: str) -> int:
     """Very rough heuristic: looks for phrases like 'X years', 'Y months'."""
-    years = re.findall(r"(\d+)\s+years?", text, flags=re.I)
-    months = re.findall(r"(\d+)\s+months?", text, flags=re.I)
+    years = _YEARS_RE.findall(text)
+    months = _MONTHS_RE.findall(text)
     total = 0
     if years:
         total += sum(int(y) * 12 for y in years)
@@ -218,9 +413,34 @@ DEFAULT_SCORING = {
     'resume_quality': 15,
 }
 
+DEFAULT_TOP_TIER_LIST = ['IIT', 'NIT', 'BITS']
+
+# Points per scoring rule; written to the detail sheet as score_<field> columns
+ScoreBreakdown = namedtuple('ScoreBreakdown', [
+    'education', 'top_tier_college', 'experience', 'location', 'tagline', 'resume_quality', 'total'
+])
 
-def score_candidate(candidate: Dict, scoring_config: Dict = None) -> Dict:
-    """Compute rule-based score. candidate is a dict with keys: education_text, location, experience_months, tagline, resume_text"""
+
+TOP_TIER_MATCH_THRESHOLD = 85
+
+
+def flag_top_tier_colleges(colleges: List[str], top_tier_list: List[str]) -> List[bool]:
+    """Flag which college names match an entry of top_tier_list.
+    Uses a vectorized rapidfuzz partial_ratio matrix when available, else a plain substring check."""
+    colleges = [c if isinstance(c, str) else '' for c in colleges]
+    if not colleges or not top_tier_list:
+        return [False] * len(colleges)
+    if process is not None:
+        scores = process.cdist(colleges, top_tier_list, scorer=fuzz.partial_ratio,
+                               processor=default_process, workers=-1)
+        return (scores.max(axis=1) >= TOP_TIER_MATCH_THRESHOLD).tolist()
+    tiers = [t.lower() for t in top_tier_list]
+    return [any(t in c.lower() for t in tiers) for c in colleges]
+
+
+def score_candidate(candidate: Dict, scoring_config: Dict = None, top_tier: Optional[bool] = None) -> ScoreBreakdown:
+    """Compute rule-based score. candidate is a dict with keys: education_text, location, experience_months, tagline, resume_text
+    top_tier may be precomputed in bulk with flag_top_tier_colleges; otherwise it is derived from candidate['college']."""
     if scoring_config is None:
         scoring_config = DEFAULT_SCORING
     score_breakdown = {}
@@ -236,15 +456,12 @@ def score_candidate(candidate: Dict, scoring_config: Dict = None) -> Dict:
     total += educ_points
 
     # Top tier school: placeholder: check if school in candidate['college'] matches a list
-    top_tier = 0
-    college_name = candidate.get('college','') or ''
-    top_tier_list = scoring_config.get('top_tier_list', ['IIT', 'NIT', 'BITS'])
-    for t in top_tier_list:
-        if t.lower() in college_name.lower():
-            top_tier = scoring_config.get('top_tier_college', 0)
-            break
-    score_breakdown['top_tier_college'] = top_tier
-    total += top_tier
+    if top_tier is None:
+        top_tier_list = scoring_config.get('top_tier_list', DEFAULT_TOP_TIER_LIST)
+        top_tier = flag_top_tier_colleges([candidate.get('college','') or ''], top_tier_list)[0]
+    top_tier_pts = scoring_config.get('top_tier_college', 0) if top_tier else 0
+    score_breakdown['top_tier_college'] = top_tier_pts
+    total += top_tier_pts
 
     # Experience
     exp_months = int(candidate.get('experience_months') or 0)
@@ -264,8 +481,9 @@ def score_candidate(candidate: Dict, scoring_config: Dict = None) -> Dict:
     total += tagline_pts
 
     # Resume quality: heuristic based on length
-    resume_text = candidate.get('resume_text','') or ''
-    word_count = len(re.findall(r"\w+", resume_text))
+    word_count = candidate.get('_word_count')
+    if word_count is None:
+        word_count = len(_WORD_RE.findall(candidate.get('resume_text','') or ''))
     resume_pts = min(scoring_config.get('resume_quality', 0), int(word_count / 50))  # example: 50 words = 1 point
     score_breakdown['resume_quality'] = resume_pts
     total += resume_pts
@@ -273,26 +491,143 @@ def score_candidate(candidate: Dict, scoring_config: Dict = None) -> Dict:
     # Cap total at 100
     total = min(total, 100)
     score_breakdown['total'] = total
-    return score_breakdown
+    return ScoreBreakdown(**score_breakdown)
+
+
+def score_candidates_df(df: pd.DataFrame, scoring_config: Dict = None) -> pd.DataFrame:
+    """Vectorized score_candidate over a whole DataFrame of candidates.
+    Returns a DataFrame aligned with df.index holding one integer column per ScoreBreakdown field."""
+    if scoring_config is None:
+        scoring_config = DEFAULT_SCORING
+
+    def column(name: str) -> pd.Series:
+        if name in df.columns:
+            return df[name]
+        return pd.Series('', index=df.index, dtype=object)
+
+    scores = pd.DataFrame(index=df.index)
+
+    # Education: best-scoring degree, reusing the enrichment scan's _educ_set when present
+    educ_sets = df['_educ_set'].tolist() if '_educ_set' in df.columns else None
+    educs = column('education_text').fillna('').astype(str)
+    educ_points = np.zeros(len(df), dtype=int)
+    for key, pts in scoring_config.get('education', {}).items():
+        if key not in EDUCATION_PATTERNS:
+            continue
+        if educ_sets is not None:
+            mask = np.fromiter((key in found for found in educ_sets), dtype=bool, count=len(educ_sets))
+        else:
+            mask = educs.str.contains(EDUCATION_PATTERNS[key], regex=True, na=False).to_numpy()
+        educ_points = np.maximum(educ_points, mask * pts)
+    scores['education'] = educ_points
+
+    # Top tier school
+    top_tier_list = scoring_config.get('top_tier_list', DEFAULT_TOP_TIER_LIST)
+    top_tier = np.asarray(flag_top_tier_colleges(column('college').tolist(), top_tier_list), dtype=bool)
+    scores['top_tier_college'] = top_tier * scoring_config.get('top_tier_college', 0)
+
+    # Experience
+    exp_months = pd.to_numeric(column('experience_months'), errors='coerce').fillna(0)
+    exp_cfg = scoring_config.get('experience_in_months_threshold', {})
+    scores['experience'] = (exp_months >= exp_cfg.get('months', 9999)).astype(int) * exp_cfg.get('points', 0)
+
+    # Location
+    scores['location'] = column('location').map(scoring_config.get('location', {})).fillna(0).astype(int)
+
+    # Profile tagline: simple heuristic (presence)
+    scores['tagline'] = column('tagline').fillna('').astype(bool).astype(int) * scoring_config.get('profile_tagline', 0)
+
+    # Resume quality: heuristic based on length, reusing the enrichment scan's _word_count when present
+    if '_word_count' in df.columns:
+        word_count = df['_word_count'].astype(int)
+    else:
+        word_count = column('resume_text').fillna('').astype(str).str.count(r"\w+")
+    scores['resume_quality'] = np.minimum(scoring_config.get('resume_quality', 0), word_count // 50)
+
+    # Cap total at 100
+    scores['total'] = np.minimum(scores.sum(axis=1), 100)
+    return scores
 
 
 # SECTION 6: Notifier (SMTP simple)
 
 
+class SMTPSender:
+    """Authenticated SMTP connection reused across messages; reconnects if the server drops it.
+    Use as a context manager to batch sends: with SMTPSender() as sender: sender.send(msg)"""
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT,
+                 user: Optional[str] = SMTP_USER, password: Optional[str] = SMTP_PASSWORD):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.s: Optional[smtplib.SMTP] = None
+
+    def connect(self):
+        self.close()
+        s = smtplib.SMTP(self.host, self.port)
+        try:
+            s.starttls()
+            s.login(self.user, self.password)
+        except Exception:
+            s.close()
+            raise
+        self.s = s
+
+    def close(self):
+        if self.s is None:
+            return
+        try:
+            self.s.quit()
+        except smtplib.SMTPException:
+            self.s.close()
+        finally:
+            self.s = None
+
+    def send(self, msg: EmailMessage):
+        if self.s is None:
+            self.connect()
+        try:
+            self.s.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException) as e:
+            # Idle connections get dropped, either outright or with a 421 reply (Gmail);
+            # SMTPSenderRefused and friends carry the code as SMTPResponseException
+            if isinstance(e, smtplib.SMTPResponseException) and e.smtp_code != 421:
+                raise
+            self.connect()
+            self.s.send_message(msg)
+
+    def __enter__(self) -> 'SMTPSender':
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Process-wide lazy connection for one-off sends; idle drops are handled by SMTPSender.send
+_shared_sender = SMTPSender()
+_shared_sender_lock = threading.Lock()
+
+
+def build_email(to_email: str, subject: str, body: str, from_email: str = FROM_EMAIL) -> EmailMessage:
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg.set_content(body)
+    return msg
+
+
 def send_email_smtp(to_email: str, subject: str, body: str, from_email: str = FROM_EMAIL) -> bool:
     if not SMTP_USER or not SMTP_PASSWORD:
         logger.warning('SMTP credentials not set; skipping send_email')
         return False
     try:
-        msg = EmailMessage()
-        msg['Subject'] = subject
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg.set_content(body)
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as s:
-            s.starttls()
-            s.login(SMTP_USER, SMTP_PASSWORD)
-            s.send_message(msg)
+        msg = build_email(to_email, subject, body, from_email)
+        with _shared_sender_lock:
+            _shared_sender.send(msg)
         logger.info('Sent mail to %s', to_email)
         return True
     except Exception as e:
@@ -303,29 +638,114 @@ def send_email_smtp(to_email: str, subject: str, body: str, from_email: str = FR
 # SECTION 7: Follow-up scheduler and workflow
 
 
-scheduler = BackgroundScheduler()
+# Follow-ups persist across restarts; stable job ids let re-runs skip jobs that are already queued.
+# The periodic ETL job wraps a live SheetsWrapper, so it stays in the in-memory store.
+scheduler = BackgroundScheduler(jobstores={
+    'default': SQLAlchemyJobStore(url=JOBSTORE_URL),
+    'memory': MemoryJobStore(),
+})
 
+# Delivered follow-up job ids, kept next to the job store. A fired date job disappears from
+# the store whether or not the mail went out, so this is the only proof of delivery.
+_FOLLOWUPS_SENT = Table(
+    'followups_sent', MetaData(),
+    Column('id', String(191), primary_key=True),
+    Column('sent_at', DateTime, nullable=False),
+)
 
-def schedule_followups_for_candidate(candidate_row: Dict, start_date: Optional[datetime] = None):
-    """Schedule follow-ups via APScheduler. For demonstration, we schedule in the background.
-    In real deployment, use persistent job store (e.g., Redis, DB) or Cron.
-    """
+
+@lru_cache(maxsize=None)
+def _followup_log_engine():
+    engine = create_engine(JOBSTORE_URL)
+    _FOLLOWUPS_SENT.create(engine, checkfirst=True)
+    return engine
+
+
+def _sent_followup_ids() -> set:
+    with _followup_log_engine().connect() as conn:
+        return set(conn.execute(select(_FOLLOWUPS_SENT.c.id)).scalars())
+
+
+def _record_followup_sent(followup_id: str):
+    with _followup_log_engine().begin() as conn:
+        conn.execute(_FOLLOWUPS_SENT.insert().values(id=followup_id, sent_at=datetime.now()))
+
+
+def _send_followups(messages: List[Tuple[str, str, str, str]]):
+    """Top-level (picklable) job target: sends every follow-up due at one run_date over a single
+    SMTP connection. messages holds (followup id, to_email, subject, body) tuples."""
+    if not SMTP_USER or not SMTP_PASSWORD:
+        logger.warning('SMTP credentials not set; skipping %d follow-ups', len(messages))
+        return
+    try:
+        with SMTPSender() as sender:
+            for followup_id, to_email, subject, body in messages:
+                try:
+                    sender.send(build_email(to_email, subject, body))
+                except Exception as e:
+                    logger.exception('Failed to send email: %s', e)
+                    continue
+                _record_followup_sent(followup_id)
+                logger.info('Sent mail to %s', to_email)
+    except Exception as e:
+        logger.exception('SMTP connection failed: %s', e)
+
+
+def _handled_followup_ids() -> set:
+    """Follow-up ids that are already sent or waiting in the persistent job store."""
+    handled = _sent_followup_ids()
+    for job in scheduler.get_jobs(jobstore='default'):
+        if job.func is _send_followups:
+            handled.update(followup_id for followup_id, *_ in job.args[0])
+    return handled
+
+
+def _due_followups(candidate_row: Dict, now: datetime, handled: set,
+                   start_date: Optional[datetime] = None) -> Tuple[datetime, List[Tuple[datetime, Tuple[str, str, str, str]]]]:
+    """Anchor and (run_date, message) pairs of the candidate's follow-ups that still need queueing."""
     if start_date is None:
-        start_date = datetime.now()
+        try:
+            start_date = datetime.fromisoformat(str(candidate_row.get('followups_start') or ''))
+        except ValueError:
+            start_date = now
     candidate_email = candidate_row.get('email')
     candidate_id = candidate_row.get('id') or candidate_row.get('email')
 
+    due = []
     for idx, (offset_days, message) in enumerate(DEFAULT_FOLLOWUPS, start=1):
-        run_date = start_date + timedelta(days=offset_days-1)
-        job_id = f"followup-{candidate_id}-{idx}"
-
-        def make_job(to_email, subject, body):
-            def job():
-                send_email_smtp(to_email, subject, body)
-            return job
-
-        scheduler.add_job(make_job(candidate_email, f"Follow-up #{idx}", message), 'date', run_date=run_date, id=job_id)
-        logger.info('Scheduled followup %s for %s at %s', idx, candidate_email, run_date)
+        followup_id = f"followup-{candidate_id}-{idx}"
+        if followup_id in handled:
+            continue
+        run_date = max(start_date + timedelta(days=offset_days-1), now)
+        due.append((run_date, (followup_id, candidate_email, f"Follow-up #{idx}", message)))
+    return start_date, due
+
+
+def _queue_followups(due: List[Tuple[datetime, Tuple[str, str, str, str]]]):
+    """Add one job per distinct run_date so follow-ups that fire together share a connection."""
+    batches: Dict[datetime, List[Tuple[str, str, str, str]]] = {}
+    for run_date, message in due:
+        batches.setdefault(run_date, []).append(message)
+    for run_date, messages in batches.items():
+        digest = hashlib.sha256('|'.join(m[0] for m in messages).encode('utf-8')).hexdigest()[:16]
+        # No misfire grace: a batch due while the process was down goes out on restart
+        scheduler.add_job(_send_followups, 'date', run_date=run_date, id=f"followups-{run_date:%Y%m%dT%H%M%S}-{digest}",
+                          jobstore='default', misfire_grace_time=None, args=(messages,))
+        logger.info('Scheduled %d follow-ups at %s', len(messages), run_date)
+
+
+def schedule_followups_for_candidate(candidate_row: Dict, start_date: Optional[datetime] = None) -> datetime:
+    """Queue the candidate's follow-ups in the running scheduler's persistent job store.
+
+    The sequence is anchored to the candidate's ``followups_start`` (first time they were
+    scheduled), so repeated ETL runs don't push pending follow-ups forward. Follow-ups that
+    are already queued or recorded as sent are skipped; any other follow-up whose date has
+    passed is queued to go out now. Returns the anchor so the caller can persist it.
+    """
+    now = datetime.now().replace(microsecond=0)
+    anchor, due = _due_followups(candidate_row, now, _handled_followup_ids(), start_date)
+    _queue_followups(due)
+    return anchor
 
 
 # SECTION 8: End-to-end processing
@@ -338,40 +758,114 @@ def process_master_and_details(client_wrapper: SheetsWrapper, scoring_config: Di
     # Example: iterate master rows (job postings), for each posting, load candidate urls from the detail sheet link column
     # For simplicity, we'll assume detail_df already has candidate rows with at least: email, resume_url, resume_text
 
-    updated_rows = []
-    for idx, row in detail_df.iterrows():
-        candidate = dict(row)
-        # If resume_text missing, try to fetch from URL or local path
-        if not candidate.get('resume_text') and candidate.get('resume_url'):
-            candidate['resume_text'] = fetch_resume_text_from_url(candidate['resume_url'])
-        elif not candidate.get('resume_text') and candidate.get('resume_path'):
-            rp = candidate['resume_path']
-            if rp.lower().endswith('.pdf'):
-                candidate['resume_text'] = extract_text_from_pdf(rp)
-            elif rp.lower().endswith('.docx'):
-                candidate['resume_text'] = extract_text_from_docx(rp)
-
-        # Enrich
-        candidate['education_text'] = '\n'.join(detect_education(candidate.get('resume_text','')))
-        candidate['location'] = candidate.get('location') or detect_location(candidate.get('resume_text',''))
-        candidate['experience_months'] = candidate.get('experience_months') or estimate_experience_months(candidate.get('resume_text',''))
-
-        # Score
-        score_br = score_candidate(candidate, scoring_config=scoring_config)
-        candidate.update({ 'score_total': score_br['total'], 'score_breakdown': json.dumps(score_br) })
-
-        # Add scheduling (if needed)
-        if run_followups and candidate.get('email'):
-            schedule_followups_for_candidate(candidate)
-
-        updated_rows.append(candidate)
-
-    # Convert back to DataFrame and write
-    updated_df = pd.DataFrame(updated_rows)
+    if detail_df.empty:
+        logger.info('Detail sheet has no candidates; nothing to update')
+        return
+
+    # Preallocate the enriched columns so results are written into detail_df in place
+    for col in ('resume_text', 'resume_fetched_at', 'location', 'experience_months'):
+        if col in detail_df.columns:
+            detail_df[col] = detail_df[col].fillna('').astype(object)
+        else:
+            detail_df[col] = pd.Series('', index=detail_df.index, dtype=object)
+
+    # Plain dicts are far cheaper to walk than the Series boxed by iterrows
+    records = detail_df.to_dict(orient='records')
+
+    # Stage 1: collect rows with a URL or local path whose resume_text is missing, or was
+    # loaded before the row's updated_at. URL resumes already in the on-disk cache are
+    # taken straight away.
+    fetched_at = datetime.now().isoformat(timespec='seconds')
+    loaded = {}  # idx -> text; '' when the fetch or parse failed
+    downloads = []  # (idx, url, cache key)
+    parse_jobs = []  # (idx, path or bytes, kind, updated_at, cache key)
+    for idx, candidate in zip(detail_df.index, records):
+        updated_at = _parse_updated_at(candidate.get('updated_at'))
+        if candidate.get('resume_text'):
+            loaded_at = _parse_updated_at(candidate.get('resume_fetched_at'))
+            if updated_at is None or (loaded_at is not None and updated_at <= loaded_at):
+                continue
+        if candidate.get('resume_url'):
+            key = _url_cache_key(candidate['resume_url'])
+            text = _cache_lookup(key, updated_at)
+            if text is not None:
+                loaded[idx] = text
+            else:
+                downloads.append((idx, candidate['resume_url'], key))
+        elif candidate.get('resume_path'):
+            parse_jobs.append((idx, candidate['resume_path'], None, updated_at, None))
+
+    # Stage 2a: downloads are I/O-bound, so overlap them on threads. The threads only fetch
+    # bytes: pdfium is not thread-safe, so every parse happens in the process pool below.
+    if downloads:
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            results = ex.map(download_resume, [url for _, url, _ in downloads])
+            for (idx, _, key), (payload, kind) in zip(downloads, results):
+                if kind == 'text':
+                    loaded[idx] = payload
+                    _cache_store(key, payload)
+                else:
+                    parse_jobs.append((idx, payload, kind, None, key))
+
+    # Stage 2b: parsing is CPU-bound, so spread it across processes
+    if parse_jobs:
+        idxs, sources, kinds, updated, keys = zip(*parse_jobs)
+        with ProcessPoolExecutor(max_workers=min(len(parse_jobs), os.cpu_count() or 1)) as ex:
+            for idx, key, text in zip(idxs, keys, ex.map(_extract_worker, sources, kinds, updated, chunksize=4)):
+                loaded[idx] = text
+                if key is not None:
+                    _cache_store(key, text)
+
+    # A failed reload keeps the previous text and leaves resume_fetched_at alone, so it is retried
+    ok = {idx: text for idx, text in loaded.items() if text}
+    if ok:
+        detail_df.loc[list(ok), 'resume_text'] = list(ok.values())
+        detail_df.loc[list(ok), 'resume_fetched_at'] = fetched_at
+
+    # Stage 3: enrichment is cheap, run it serially. Each precompiled helper is a single
+    # C-level scan, which beats dispatching every token through one fused Python loop.
+    texts = detail_df['resume_text'].tolist()
+    detail_df['_educ_set'] = [tuple(detect_education(text)) for text in texts]
+    detail_df['_word_count'] = [len(_WORD_RE.findall(text)) for text in texts]
+    detail_df['education_text'] = detail_df['_educ_set'].str.join(';')
+    # Location and experience are only derived for the cells the sheet left blank
+    # An undetected location stays blank; experience keeps its numeric 0
+    for col, helper, missing in (('location', detect_location, ''), ('experience_months', estimate_experience_months, 0)):
+        blank = np.array([not v for v in detail_df[col].tolist()], dtype=bool)
+        if blank.any():
+            detail_df.loc[blank, col] = [helper(texts[i]) or missing for i in np.flatnonzero(blank)]
+
+    # Add scheduling (if needed)
+    if run_followups and not scheduler.running:
+        # Jobs added before start() never reach the job store (e.g. --run-once), so leave
+        # followups_start unset and let the next scheduled run queue them
+        logger.warning('Scheduler is not running; follow-ups were not queued')
+    elif run_followups:
+        if 'followups_start' not in detail_df.columns:
+            detail_df['followups_start'] = ''
+        # One shared "now" anchors every new candidate of this run to the same dates,
+        # so their follow-ups are queued as batches rather than one job per email
+        now = datetime.now().replace(microsecond=0)
+        handled = _handled_followup_ids()
+        due = []
+        for idx, candidate in zip(detail_df.index, records):
+            if candidate.get('email'):
+                started, candidate_due = _due_followups(candidate, now, handled)
+                due.extend(candidate_due)
+                detail_df.at[idx, 'followups_start'] = started.isoformat(timespec='seconds')
+        _queue_followups(due)
+
+    # Score all candidates at once
+    scores = score_candidates_df(detail_df, scoring_config=scoring_config)
+    del detail_df['_educ_set'], detail_df['_word_count']
+    # Superseded by the score_* columns; the padded overwrite blanks the cells it leaves behind
+    detail_df.drop(columns='score_breakdown', errors='ignore', inplace=True)
+    for field in ScoreBreakdown._fields:
+        detail_df[f'score_{field}'] = scores[field]
 
     # ensure columns are strings/lists flattened
-    client_wrapper.update_detail_from_df(updated_df)
-    logger.info('Updated detail sheet with %d candidates', len(updated_df))
+    client_wrapper.update_detail_from_df(detail_df)
+    logger.info('Updated detail sheet with %d candidates', len(detail_df))
 
 
 # SECTION 9: CLI and entrypoint
@@ -399,12 +893,11 @@ def main():
 
     if args.schedule:
         # Start scheduler and run job periodically (e.g., every day at 02:00) — here: every 12 hours for demo
-        scheduler.add_job(lambda: process_master_and_details(wrapper, scoring_config=DEFAULT_SCORING, run_followups=True), 'interval', hours=12, id='daily-run')
+        scheduler.add_job(lambda: process_master_and_details(wrapper, scoring_config=DEFAULT_SCORING, run_followups=True), 'interval', hours=12, id='daily-run', jobstore='memory')
         scheduler.start()
         logger.info('Scheduler started — running in background. Press Ctrl+C to exit.')
         try:
             # Keep main thread alive
-            import time
             while True:
                 time.sleep(60)
         except (KeyboardInterrupt, SystemExit):
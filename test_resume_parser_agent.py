@@ -0,0 +1,366 @@
+import random
+import re
+import smtplib
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+from docx import Document
+
+import resume_parser_agent as agent
+
+
+SAMPLE_TEXTS = [
+    '',
+    'B.Tech from IIT, lives in hyderabad. 2 years and 6 months. MBA, Master of Science',
+    'Currently in Bangalore, relocating to Hyderabad',
+    'Bachelor of Technology in Delhi; 7 months internship at Mumbai',
+    'abc12 years of hobby coding, 1.5 years at Pune',
+    'XBTech, Master of Sciences, B.M.Tech, 3 monthsX, 5 yearsX',
+]
+
+TOKENS = [
+    'B.Tech', 'BTech', 'BTechs', 'XBTech', 'M.Sc', 'MBA', 'Master of Science', 'Master of Sciences',
+    'Bachelor of Technology', 'M.Tech', 'B.M.Tech', 'Hyderabad', 'Pune', 'Bangalore', 'Delhi',
+    'PUNE', 'bengaluru', 'xDelhi', 'Delhi_', 'Chennai2',
+    '5 years', 'abc12 years', '3 months', '1.5 years', 'yearsX', 'and', ',', '.', '\n', '_',
+]
+
+
+def random_texts(n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield ''.join(rng.choice(TOKENS) + rng.choice([' ', '', '\n']) for _ in range(rng.randint(0, 12)))
+
+
+BASELINE_EDUCATION_PATTERNS = {
+    'btech': r"\bB\.?\s?Tech\b|Bachelor\s+of\s+Technology|BTech\b",
+    'bsc': r"\bB\.?\s?Sc\b|Bachelor\s+of\s+Science",
+    'mtech': r"\bM\.?\s?Tech\b|Master\s+of\s+Technology",
+    'msc': r"\bM\.?\s?Sc\b|Master\s+of\s+Science",
+    'mba': r"\bMBA\b|Master\s+of\s+Business\s+Administration",
+}
+
+
+def baseline_education(text):
+    return [k for k, pat in BASELINE_EDUCATION_PATTERNS.items() if re.search(pat, text, flags=re.I)]
+
+
+def baseline_experience_months(text):
+    years = re.findall(r"(\d+)\s+years?", text, flags=re.I)
+    months = re.findall(r"(\d+)\s+months?", text, flags=re.I)
+    return sum(int(y) * 12 for y in years) + sum(int(m) for m in months)
+
+
+def baseline_location(text):
+    for loc in agent.LOCATION_KEYWORDS:
+        if re.search(r'\b' + re.escape(loc) + r'\b', text, flags=re.I):
+            return loc
+    return None
+
+
+def test_enrichment_helpers_match_uncompiled_patterns():
+    for text in SAMPLE_TEXTS + list(random_texts(2000)):
+        assert agent.detect_education(text) == baseline_education(text), text
+        assert agent.detect_location(text) == baseline_location(text), text
+        assert agent.estimate_experience_months(text) == baseline_experience_months(text), text
+
+
+def test_enrichment_helpers_match_inside_words():
+    assert 'msc' in agent.detect_education('Master of Sciences')
+    assert 'btech' in agent.detect_education('XBTech')
+    assert agent.estimate_experience_months('5 yearsX') == 60
+    assert agent.estimate_experience_months('abc12 years') == 144
+
+
+def test_detect_location_prefers_keyword_order():
+    assert agent.detect_location('Currently in Bangalore, relocating to Hyderabad') == 'Hyderabad'
+
+
+def test_score_candidates_df_matches_score_candidate():
+    rng = random.Random(1)
+    rows = []
+    for _ in range(300):
+        rows.append({
+            'education_text': rng.choice(['', 'btech', 'mtech;mba', 'bsc', 'msc;mba']),
+            'college': rng.choice(['IIT Bombay', 'NIT Warangal', 'Osmania University', '', None]),
+            'experience_months': rng.choice([0, 3, 5, '12', '', None]),
+            'location': rng.choice(['Hyderabad', 'Pune', '', None]),
+            'tagline': rng.choice(['', 'Backend engineer', None]),
+            'resume_text': rng.choice([None, 'word ' * rng.randint(0, 1000)]),
+        })
+    scores = agent.score_candidates_df(pd.DataFrame(rows))
+    for i, row in enumerate(rows):
+        assert agent.score_candidate(row) == agent.ScoreBreakdown(**scores.iloc[i].to_dict()), row
+
+
+class FakeWorksheet:
+    def __init__(self, ss):
+        self.ss = ss
+
+    def get_all_values(self):
+        self.ss.downloads += 1
+        rows = [list(r) for r in self.ss.grid]
+        # Sheets trims trailing blank rows and columns
+        while rows and not any(rows[-1]):
+            rows.pop()
+        width = max((max((i + 1 for i, v in enumerate(r) if v != ''), default=0) for r in rows), default=0)
+        return [[str(v) for v in (r + [''] * width)[:width]] for r in rows]
+
+    def row_values(self, n):
+        return [str(v) for v in self.ss.grid[n - 1] if v != '']
+
+    def append_rows(self, values, value_input_option=None):
+        self.ss.requests.append('append_rows')
+        self.ss.grid.extend(list(r) for r in values)
+        self.ss.modified += 1
+
+
+class FakeSpreadsheet:
+    def __init__(self, key, grid):
+        self.id = key
+        self.grid = [list(r) for r in grid]
+        self.modified = 0
+        self.downloads = 0
+        self.requests = []
+        self.on_update = None
+
+    def get_lastUpdateTime(self):
+        return str(self.modified)
+
+    def worksheet(self, name):
+        return FakeWorksheet(self)
+
+    def values_clear(self, rng):
+        self.requests.append('values_clear')
+        self.grid = []
+        self.modified += 1
+
+    def values_update(self, rng, params=None, body=None):
+        self.requests.append('values_update')
+        for i, row in enumerate(body['values']):
+            while len(self.grid) <= i:
+                self.grid.append([])
+            cur = self.grid[i]
+            cur.extend([''] * (len(row) - len(cur)))
+            cur[:len(row)] = row
+        self.modified += 1
+        if self.on_update is not None:
+            self.on_update()
+
+
+class FakeClient:
+    def __init__(self, sheets):
+        self.sheets = sheets
+
+    def open_by_key(self, key):
+        return self.sheets[key]
+
+
+def make_wrapper(detail_grid):
+    master = FakeSpreadsheet('master', [['job'], ['x']])
+    detail = FakeSpreadsheet('detail', detail_grid)
+    return agent.SheetsWrapper(FakeClient({'master': master, 'detail': detail}), 'master', 'detail'), detail
+
+
+def test_update_detail_from_df_blanks_rows_and_columns_when_frame_shrinks():
+    wrapper, detail = make_wrapper([['email', 'score', 'extra'], ['a@x', '1', 'p'], ['b@x', '2', 'q'], ['c@x', '3', 'r']])
+    df = wrapper.read_detail()
+    wrapper.update_detail_from_df(df.loc[[0], ['email', 'score']])
+    assert detail.requests == ['values_update']
+    assert FakeWorksheet(detail).get_all_values() == [['email', 'score'], ['a@x', '1']]
+
+
+def test_append_detail_rows_sends_one_request_in_header_order():
+    wrapper, detail = make_wrapper([['email', 'score'], ['a@x', '1']])
+    wrapper.append_detail_rows([{'score': 2, 'email': 'b@x'}, {'email': 'c@x'}])
+    assert detail.requests == ['append_rows']
+    assert FakeWorksheet(detail).get_all_values() == [['email', 'score'], ['a@x', '1'], ['b@x', '2'], ['c@x', '']]
+
+
+def test_read_sheet_is_cached_until_the_spreadsheet_changes():
+    wrapper, detail = make_wrapper([['email', 'score'], ['a@x', '1']])
+    wrapper.read_detail()
+    wrapper.read_detail()
+    assert detail.downloads == 1
+    detail.grid[1][1] = '5'
+    detail.modified += 1
+    assert wrapper.read_detail()['score'].tolist() == [5]
+    assert detail.downloads == 2
+
+
+def test_read_sheet_restores_numeric_cells():
+    wrapper, _ = make_wrapper([['email', 'experience_months'], ['a@x', '24'], ['b@x', '']])
+    assert wrapper.read_detail()['experience_months'].tolist() == [24, '']
+
+
+def test_edit_after_our_write_is_not_masked_by_the_cache():
+    wrapper, detail = make_wrapper([['email', 'score'], ['a@x', '1'], ['b@x', '2']])
+
+    def concurrent_edit():
+        # Someone edits the sheet right after our write lands
+        detail.on_update = None
+        detail.grid[1][1] = 9
+        detail.modified += 1
+
+    detail.on_update = concurrent_edit
+    wrapper.update_detail_from_df(wrapper.read_detail())
+    assert wrapper.read_detail()['score'].tolist() == [9, 2]
+
+
+def test_overwrite_without_a_prior_read_clears_first():
+    wrapper, detail = make_wrapper([['email', 'score'], ['a@x', '1'], ['b@x', '2']])
+    wrapper.update_detail_from_df(pd.DataFrame({'email': ['c@x']}))
+    assert detail.requests == ['values_clear', 'values_update']
+    assert FakeWorksheet(detail).get_all_values() == [['email'], ['c@x']]
+    # The written extent is remembered, so the next shrink is a single request again
+    wrapper.update_detail_from_df(pd.DataFrame({'email': []}))
+    assert detail.requests[2:] == ['values_update']
+    assert FakeWorksheet(detail).get_all_values() == [['email']]
+
+
+@pytest.fixture
+def followup_scheduler(tmp_path, monkeypatch):
+    sched = BackgroundScheduler(jobstores={'default': MemoryJobStore()})
+    sched.start(paused=True)
+    monkeypatch.setattr(agent, 'scheduler', sched)
+    monkeypatch.setattr(agent, 'JOBSTORE_URL', f"sqlite:///{tmp_path / 'jobs.sqlite'}")
+    agent._followup_log_engine.cache_clear()
+    yield sched
+    sched.shutdown(wait=False)
+    agent._followup_log_engine.cache_clear()
+
+
+def queued_dates(sched):
+    return {followup_id: job.trigger.run_date.replace(tzinfo=None)
+            for job in sched.get_jobs() for followup_id, *_ in job.args[0]}
+
+
+def test_followups_keep_their_anchor_across_runs(followup_scheduler):
+    row = {'email': 'a@x'}
+    anchor = agent.schedule_followups_for_candidate(row)
+    first = queued_dates(followup_scheduler)
+    assert len(first) == len(agent.DEFAULT_FOLLOWUPS)
+    row['followups_start'] = anchor.isoformat(timespec='seconds')
+    for _ in range(3):
+        assert agent.schedule_followups_for_candidate(row) == anchor
+    assert queued_dates(followup_scheduler) == first
+
+
+def test_overdue_followups_are_queued_unless_recorded_as_sent(followup_scheduler):
+    anchor = datetime.now().replace(microsecond=0) - timedelta(days=5)
+    agent._record_followup_sent('followup-a@x-1')
+    agent.schedule_followups_for_candidate({'email': 'a@x', 'followups_start': anchor.isoformat()})
+    dates = queued_dates(followup_scheduler)
+    # Nothing but #1 was ever delivered, so #2-#4 are due now instead of being dropped
+    assert sorted(dates) == [f'followup-a@x-{i}' for i in range(2, 9)]
+    assert all(dates[f'followup-a@x-{i}'] >= datetime.now() - timedelta(minutes=1) for i in range(2, 5))
+    assert dates['followup-a@x-5'] == anchor + timedelta(days=9)
+
+
+class FakeSMTPSender:
+    connections = 0
+    sent = []
+
+    def __enter__(self):
+        FakeSMTPSender.connections += 1
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def send(self, msg):
+        if msg['To'] == 'bounce@x':
+            raise smtplib.SMTPRecipientsRefused({msg['To']: (550, b'no such user')})
+        FakeSMTPSender.sent.append(msg['To'])
+
+
+def test_send_followups_uses_one_connection_and_records_delivery(followup_scheduler, monkeypatch):
+    monkeypatch.setattr(agent, 'SMTP_USER', 'me@x')
+    monkeypatch.setattr(agent, 'SMTP_PASSWORD', 'secret')
+    monkeypatch.setattr(agent, 'SMTPSender', FakeSMTPSender)
+    FakeSMTPSender.connections, FakeSMTPSender.sent = 0, []
+    agent._send_followups([
+        ('followup-a@x-1', 'a@x', 'Follow-up #1', 'hi'),
+        ('followup-bounce@x-1', 'bounce@x', 'Follow-up #1', 'hi'),
+        ('followup-c@x-1', 'c@x', 'Follow-up #1', 'hi'),
+    ])
+    assert FakeSMTPSender.connections == 1
+    assert FakeSMTPSender.sent == ['a@x', 'c@x']
+    assert agent._sent_followup_ids() == {'followup-a@x-1', 'followup-c@x-1'}
+
+
+def test_followups_of_one_run_are_batched_by_run_date(followup_scheduler):
+    wrapper, detail = make_wrapper([['email', 'resume_text'], ['a@x', 'B.Tech'], ['b@x', 'MBA'], ['c@x', '']])
+    agent.process_master_and_details(wrapper, run_followups=True)
+    jobs = followup_scheduler.get_jobs()
+    assert len(jobs) == len(agent.DEFAULT_FOLLOWUPS)
+    assert all([m[1] for m in job.args[0]] == ['a@x', 'b@x', 'c@x'] for job in jobs)
+    # A second tick queues nothing new
+    agent.process_master_and_details(wrapper, run_followups=True)
+    assert len(followup_scheduler.get_jobs()) == len(agent.DEFAULT_FOLLOWUPS)
+
+
+def test_followup_anchor_not_persisted_without_running_scheduler(monkeypatch):
+    monkeypatch.setattr(agent, 'scheduler', BackgroundScheduler(jobstores={'default': MemoryJobStore()}))
+    wrapper, detail = make_wrapper([['email', 'resume_text'], ['a@x', 'B.Tech Pune']])
+    agent.process_master_and_details(wrapper, run_followups=True)
+    header = FakeWorksheet(detail).get_all_values()[0]
+    assert 'followups_start' not in header
+    assert agent.scheduler.get_jobs() == []
+
+
+def test_pipeline_drops_legacy_score_breakdown_column():
+    wrapper, detail = make_wrapper([
+        ['email', 'resume_text', 'score_breakdown'],
+        ['a@x', 'B.Tech Hyderabad 2 years', '{"total": 1}'],
+    ])
+    agent.process_master_and_details(wrapper)
+    rows = FakeWorksheet(detail).get_all_values()
+    assert 'score_breakdown' not in rows[0]
+    assert '{"total": 1}' not in rows[1]
+    assert rows[1][rows[0].index('score_total')] == '40'
+
+
+def test_pipeline_writes_zero_experience_and_blank_location_when_undetected():
+    wrapper, detail = make_wrapper([['email', 'resume_text'], ['a@x', 'B.Tech, no dates or cities']])
+    agent.process_master_and_details(wrapper)
+    written = detail.grid
+    header = written[0]
+    assert written[1][header.index('experience_months')] == 0
+    assert written[1][header.index('location')] == ''
+
+
+@pytest.fixture
+def resume_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(agent, 'RESUME_CACHE_DIR', str(tmp_path / 'cache'))
+    agent._resume_cache.cache_clear()
+    yield
+    agent._resume_cache.cache_clear()
+
+
+def write_docx(path, text):
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.save(path)
+
+
+def test_filled_resume_text_is_reloaded_when_updated_at_is_newer(tmp_path, resume_cache):
+    path = str(tmp_path / 'cv.docx')
+    write_docx(path, 'MBA Pune')
+    wrapper, detail = make_wrapper([
+        ['email', 'resume_path', 'resume_text', 'updated_at'],
+        ['a@x', path, 'old text', ''],
+        ['b@x', path, 'old text', datetime.now().isoformat(timespec='seconds')],
+    ])
+    agent.process_master_and_details(wrapper)
+    df = wrapper.read_detail()
+    assert df['resume_text'].tolist() == ['old text', 'MBA Pune']
+    assert df['resume_fetched_at'].tolist()[0] == ''
+
+    # Already reloaded after updated_at: later runs leave the text alone
+    write_docx(path, 'MBA Chennai')
+    agent.process_master_and_details(wrapper)
+    assert wrapper.read_detail()['resume_text'].tolist() == ['old text', 'MBA Pune']